@@ -32,6 +32,7 @@ import logging
 import sys
 import time
 from datetime import date, datetime
+from functools import lru_cache
 
 import colorlog
 import pytz
@@ -42,7 +43,7 @@ from src.market_data   import MarketData
 from src.order_manager import OrderManager
 from src.risk_manager  import RiskManager
 from src.stock_selector import StockSelector
-from src.strategy      import ORBStrategy, Signal
+from src.strategy      import ORBStrategy, Signal, _last
 import src.notifier    as notifier
 
 
@@ -94,10 +95,26 @@ def _wait_until(target_time_str: str) -> None:
     time.sleep(max(wait_secs, 0))
 
 
-def _past_time(time_str: str) -> bool:
-    now = _now_ist()
+@lru_cache(maxsize=None)
+def _minutes(time_str: str) -> int:
+    """'HH:MM' → minutes since midnight (parsed once per distinct string)."""
     h, m = map(int, time_str.split(":"))
-    return now.hour > h or (now.hour == h and now.minute >= m)
+    return h * 60 + m
+
+
+def _now_min() -> int:
+    """Current IST time as minutes since midnight."""
+    now = _now_ist()
+    return now.hour * 60 + now.minute
+
+
+def _past_time(time_str: str) -> bool:
+    return _now_min() >= _minutes(time_str)
+
+
+def _latest_atr(df) -> float:
+    """ATR of the latest candle, read the way the strategy reads it (NaN → 0)."""
+    return _last(df["atr"].to_numpy(), 0.0)
 
 
 # ── Main ──────────────────────────────────────────────────────────────────────
@@ -182,6 +199,7 @@ def main() -> None:
             order_manager.exit_all_positions()
             # Book any remaining open position
             if active_key and strategies[active_key].position:
+                strategies[active_key].position.flush_trail_log()
                 ltp = market_data.get_ltp(active_key) or entry_price[active_key]
                 pnl = risk_manager.record_trade(
                     active_key, strategies[active_key].position.side,
@@ -202,6 +220,7 @@ def main() -> None:
                 order_manager.exit_all_positions()
                 # Book the open position so the loss is realised and reported
                 if active_key and strategies[active_key].position:
+                    strategies[active_key].position.flush_trail_log()
                     ltp = market_data.get_ltp(active_key) or entry_price[active_key]
                     pnl = risk_manager.record_trade(
                         active_key, strategies[active_key].position.side,
@@ -235,6 +254,7 @@ def main() -> None:
                 order_manager.exit_all_positions()
                 # Book the open position
                 if active_key and strategies[active_key].position:
+                    strategies[active_key].position.flush_trail_log()
                     ltp = market_data.get_ltp(active_key) or entry_price[active_key]
                     pnl = risk_manager.record_trade(
                         active_key, strategies[active_key].position.side,
@@ -274,18 +294,13 @@ def main() -> None:
                 # The strategy checks stops on 5-min candle close, but price
                 # can gap past the stop between candles. Check LTP directly.
                 p = strategies[active_key].position
-                should_exit = False
-                if p.side == "BUY" and ltp <= p.stop_loss:
-                    should_exit = True
-                elif p.side == "SHORT" and ltp >= p.stop_loss:
-                    should_exit = True
-
-                if should_exit:
+                if p.side_sign * ltp <= p.side_sign * p.stop_loss:
+                    p.flush_trail_log()
                     logger.warning(
                         "LIVE STOP-LOSS HIT for %s | LTP=%.2f | SL=%.2f | Exiting immediately.",
                         active_key, ltp, p.stop_loss,
                     )
-                    close_side = "SELL" if p.side == "BUY" else "BUY"
+                    close_side = "SELL" if p.side_sign == 1 else "BUY"
                     exit_signal = Signal(
                         "EXIT", active_key,
                         f"Live stop-loss hit @ LTP={ltp:.2f} (SL={p.stop_loss:.2f})",
@@ -327,15 +342,15 @@ def main() -> None:
                         continue  # will hit risk-limit check at top of loop
 
         # ── No new entries after TRADING_STOP_TIME or during mid-day pause ────
+        now_min = _now_min()
         in_mid_day_pause = (
-            _past_time(cfg.MID_DAY_PAUSE_START)
-            and not _past_time(cfg.MID_DAY_PAUSE_END)
+            _minutes(cfg.MID_DAY_PAUSE_START) <= now_min < _minutes(cfg.MID_DAY_PAUSE_END)
         )
         if in_mid_day_pause and active_key is None:
             logger.info("[%s] Mid-day pause (12:00–13:30). Skipping new entries.", now_str)
 
         can_enter = (
-            not _past_time(cfg.TRADING_STOP_TIME)
+            now_min < _minutes(cfg.TRADING_STOP_TIME)
             and not in_mid_day_pause
             and risk_manager.can_trade()
         )
@@ -385,7 +400,7 @@ def main() -> None:
                     if strat.position:
                         # Recalculate ATR-based stops from actual fill price
                         from src.strategy import _calc_stop_target
-                        atr_val = float(df.iloc[-1].get("atr", 0) or 0)
+                        atr_val = _latest_atr(df)
                         sl, tgt, risk = _calc_stop_target(fill_price, atr_val, "BUY")
                         strat.position.entry_price = fill_price
                         strat.position.stop_loss   = sl
@@ -394,7 +409,7 @@ def main() -> None:
                         strat.position.peak_price  = fill_price
                     notifier.notify_trade_entry(
                         key, fill_price, signal.quantity,
-                        signal.stop_loss, signal.target, signal.reason,
+                        signal.stop_loss, signal.target, str(signal.reason),
                     )
                 else:
                     logger.warning("BUY order placement failed. Clearing position.")
@@ -416,7 +431,7 @@ def main() -> None:
                     active_key       = key
                     if strat.position:
                         from src.strategy import _calc_stop_target
-                        atr_val = float(df.iloc[-1].get("atr", 0) or 0)
+                        atr_val = _latest_atr(df)
                         sl, tgt, risk = _calc_stop_target(fill_price, atr_val, "SHORT")
                         strat.position.entry_price = fill_price
                         strat.position.stop_loss   = sl
@@ -425,7 +440,7 @@ def main() -> None:
                         strat.position.peak_price  = fill_price
                     notifier.notify_trade_entry(
                         key, fill_price, signal.quantity,
-                        signal.stop_loss, signal.target, signal.reason,
+                        signal.stop_loss, signal.target, str(signal.reason),
                     )
                 else:
                     logger.warning("SHORT order placement failed. Clearing position.")
@@ -458,12 +473,12 @@ def main() -> None:
                         continue
                     pnl = risk_manager.record_trade(
                         key, signal.side,
-                        entry_price[key], fill_price, signal.quantity, signal.reason,
+                        entry_price[key], fill_price, signal.quantity, str(signal.reason),
                     )
                     risk_manager.update_open_pnl(0)
                     notifier.notify_trade_exit(
                         key, entry_price[key], fill_price,
-                        signal.quantity, pnl, signal.reason,
+                        signal.quantity, pnl, str(signal.reason),
                         risk_manager.realised_pnl,
                     )
                     entry_price[key] = 0.0
@@ -0,0 +1,221 @@
+"""
+Numeric core of the ORB strategy, kept free of pandas and Python objects.
+
+evaluate_signal() takes only plain floats / ints / bools and returns an
+integer action code; evaluate_batch() runs it over many instruments in a
+parallel prange loop, and update_trailing() does the per-candle
+trailing-stop arithmetic.
+
+Only evaluate_batch() is compiled with numba.njit.  The scalar per-candle
+calls stay plain Python on purpose: for a single bar, numba's dispatch
+overhead costs more than the few comparisons it would compile (with the
+pinned pandas / numpy, a flat-bar generate_signal() measured ~29 µs plain vs
+~41 µs with the scalar kernels jitted).  numba is optional: when
+it is not installed the decorator is a no-op and evaluate_batch() runs as
+ordinary Python with identical results.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba not installed – run the kernels as plain Python
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+
+# ── Action codes ─────────────────────────────────────────────────────────────
+HOLD               = 0   # flat, nothing to do
+BUY                = 1   # open long
+SHORT              = 2   # open short
+EXIT_STOP          = 3   # stop-loss hit
+EXIT_TARGET        = 4   # target hit
+EXIT_REVERSAL      = 5   # EMA reversal against the position
+HOLD_POSITION      = 6   # in a position, no exit condition met
+HOLD_NARROW_RANGE  = 7   # opening range too narrow
+HOLD_LOW_ATR       = 8   # ATR too low
+HOLD_BUY_BLOCKED   = 9   # breakout above OR high, but a filter failed
+HOLD_SHORT_BLOCKED = 10  # breakdown below OR low, but a filter failed
+
+# Trailing-stop events reported by update_trailing() (bit flags)
+TRAIL_ACTIVATED = 1   # 1R reached, stop moved to breakeven
+TRAIL_MOVED     = 2   # trailing stop ratcheted towards the peak
+
+# Position side passed to the kernel (also the sign of the trade's P&L)
+FLAT  = 0
+LONG  = 1
+SHORT_SIDE = -1
+
+
+def evaluate_signal(
+    close, ema9, ema21, rsi, volume, vol_ma, atr, vwap,
+    or_high, or_low,
+    pos_side, stop_loss, target, trailing_active,
+    rsi_buy_min, rsi_buy_max, rsi_sell_min, rsi_sell_max,
+    vol_mult, breakout_buffer_pct, min_or_range_pct, min_atr_pct, use_vwap,
+):
+    """
+    Decide the action for the latest bar.  pos_side is LONG / SHORT_SIDE for
+    an open position (stop / target already updated for trailing) or FLAT.
+    The caller handles the "opening range not established yet" case.
+    """
+    # ── Manage existing position ──────────────────────────────────────────────
+    # pos_side doubles as the direction sign, so one set of comparisons
+    # covers both sides (close * sign <= stop * sign ⇔ stop hit).
+    if pos_side != FLAT:
+        if close * pos_side <= stop_loss * pos_side:
+            return EXIT_STOP
+        if close * pos_side >= target * pos_side:
+            return EXIT_TARGET
+        if not trailing_active and (ema9 - ema21) * pos_side < 0:
+            if (rsi < 40) if pos_side == LONG else (rsi > 60):
+                return EXIT_REVERSAL
+        return HOLD_POSITION
+
+    # ── Quality filters ───────────────────────────────────────────────────────
+    or_range_pct = (or_high - or_low) / close if close > 0 else 0.0
+    atr_pct      = atr / close if close > 0 else 0.0
+    if or_range_pct < min_or_range_pct:
+        return HOLD_NARROW_RANGE
+    if atr_pct < min_atr_pct:
+        return HOLD_LOW_ATR
+
+    # Filters are written inline, cheapest and most selective first, so the
+    # common no-breakout bar costs one comparison and a failing filter skips
+    # the rest.
+    breakout_buffer = close * breakout_buffer_pct
+
+    # ── BUY: bullish breakout above OR High ───────────────────────────────────
+    if close > or_high + breakout_buffer:
+        if (
+            ema9 > ema21
+            and rsi_buy_min <= rsi <= rsi_buy_max
+            and volume >= vol_ma * vol_mult
+            and ((not use_vwap) or (vwap > 0 and close > vwap))
+        ):
+            return BUY
+        return HOLD_BUY_BLOCKED
+
+    # ── SHORT: bearish breakdown below OR Low ─────────────────────────────────
+    if close < or_low - breakout_buffer:
+        if (
+            ema9 < ema21
+            and rsi_sell_min <= rsi <= rsi_sell_max
+            and volume >= vol_ma * vol_mult
+            and ((not use_vwap) or (vwap > 0 and close < vwap))
+        ):
+            return SHORT
+        return HOLD_SHORT_BLOCKED
+
+    return HOLD
+
+
+def update_trailing(
+    side, ltp, entry_price, initial_risk, peak_price, stop_loss, trailing_active,
+    atr, trail_mult,
+):
+    """
+    One candle of trailing-stop management for a LONG / SHORT_SIDE position.
+    Returns the updated (peak_price, stop_loss, trailing_active) plus a
+    TRAIL_* bit mask of what changed, so the caller can log outside the
+    compiled code.  Stops are not rounded: a close that matches the %.2f
+    stop shown in a reason can still be past the full-precision stop.
+    """
+    events = 0
+    if side == LONG:
+        # Track peak price
+        if ltp > peak_price:
+            peak_price = ltp
+
+        # Activate trailing after 1R profit: stop to breakeven + small buffer
+        if not trailing_active and initial_risk > 0 and ltp >= entry_price + initial_risk:
+            trailing_active = True
+            stop_loss = entry_price + 0.10
+            events |= TRAIL_ACTIVATED
+
+        # Trail stop at trail_mult × ATR below peak
+        if trailing_active and atr > 0:
+            trail_stop = peak_price - trail_mult * atr
+            if trail_stop > stop_loss:
+                stop_loss = trail_stop
+                events |= TRAIL_MOVED
+    else:
+        # Track lowest price (peak for shorts)
+        if peak_price == 0 or ltp < peak_price:
+            peak_price = ltp
+
+        if not trailing_active and initial_risk > 0 and ltp <= entry_price - initial_risk:
+            trailing_active = True
+            stop_loss = entry_price - 0.10
+            events |= TRAIL_ACTIVATED
+
+        # Trail stop at trail_mult × ATR above lowest
+        if trailing_active and atr > 0:
+            trail_stop = peak_price + trail_mult * atr
+            if trail_stop < stop_loss:
+                stop_loss = trail_stop
+                events |= TRAIL_MOVED
+
+    return peak_price, stop_loss, trailing_active, events
+
+
+# Compiled copy of evaluate_signal() for the batch loop below
+_evaluate_signal_jit = njit(cache=True)(evaluate_signal)
+
+
+@njit(parallel=True, cache=True)
+def evaluate_batch(
+    bars, or_high, or_low,
+    pos_side, stop_loss, target, trailing_active,
+    rsi_buy_min, rsi_buy_max, rsi_sell_min, rsi_sell_max,
+    vol_mult, breakout_buffer_pct, min_or_range_pct, min_atr_pct, use_vwap,
+):
+    """
+    evaluate_signal() for N instruments at once.  bars is an (N, 8) array of
+    [close, ema_fast, ema_slow, rsi, volume, vol_ma, atr, vwap]; the other
+    state arguments are length-N arrays.  Returns an int8 array of action
+    codes.  Under numba the rows are split across cores without the GIL.
+    """
+    n     = bars.shape[0]
+    codes = np.zeros(n, dtype=np.int8)
+    for i in prange(n):
+        codes[i] = _evaluate_signal_jit(
+            bars[i, 0], bars[i, 1], bars[i, 2], bars[i, 3],
+            bars[i, 4], bars[i, 5], bars[i, 6], bars[i, 7],
+            or_high[i], or_low[i],
+            pos_side[i], stop_loss[i], target[i], trailing_active[i],
+            rsi_buy_min, rsi_buy_max, rsi_sell_min, rsi_sell_max,
+            vol_mult, breakout_buffer_pct, min_or_range_pct, min_atr_pct, use_vwap,
+        )
+    return codes
+
+
+def make_evaluator(
+    rsi_buy_min, rsi_buy_max, rsi_sell_min, rsi_sell_max,
+    vol_mult, breakout_buffer_pct, min_or_range_pct, min_atr_pct, use_vwap,
+):
+    """
+    Return evaluate_signal() specialised to a fixed strategy config.
+
+    The thresholds are closed over rather than passed per call, so the
+    per-candle call carries only the bar and position state.  Like
+    evaluate_signal() it is not jitted (see the module docstring).
+    """
+    def evaluate(
+        close, ema9, ema21, rsi, volume, vol_ma, atr, vwap,
+        or_high, or_low,
+        pos_side, stop_loss, target, trailing_active,
+    ):
+        return evaluate_signal(
+            close, ema9, ema21, rsi, volume, vol_ma, atr, vwap,
+            or_high, or_low,
+            pos_side, stop_loss, target, trailing_active,
+            rsi_buy_min, rsi_buy_max, rsi_sell_min, rsi_sell_max,
+            vol_mult, breakout_buffer_pct, min_or_range_pct, min_atr_pct, use_vwap,
+        )
+
+    return evaluate
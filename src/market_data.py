@@ -195,10 +195,18 @@ class MarketData:
                 skipped_candles += 1
                 continue
             df = self.add_indicators(df)
-            latest = df.iloc[-1]
-            ltp    = latest["close"]
-            atr    = latest.get("atr", 0) or 0
-            vol_ma = latest.get("vol_ma", 1) or 1
+            # Read the last row from the column arrays (no row Series).  Short
+            # frames may lack the indicator columns, and a column still warming
+            # up ends in NaN; both fall back to the default (val != val ⇔ NaN,
+            # as in strategy._last), so NaN never reaches the atr_pct ranking.
+            columns = df.columns
+            ltp    = float(df["close"].to_numpy()[-1])
+            atr    = float(df["atr"].to_numpy()[-1]) if "atr" in columns else 0.0
+            vol_ma = float(df["vol_ma"].to_numpy()[-1]) if "vol_ma" in columns else 1.0
+            if atr != atr:
+                atr = 0.0
+            if vol_ma != vol_ma or vol_ma <= 0:
+                vol_ma = 1.0
 
             # Skip stocks where even the smallest lot (1 share) exceeds our capital
             max_affordable_price = cfg.EFFECTIVE_CAPITAL
@@ -11,15 +11,23 @@ Configure in .env:
 from __future__ import annotations
 
 import logging
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from datetime import datetime
 
 import config.settings as cfg
 
 logger = logging.getLogger(__name__)
 
+_tls_context = None   # built on first send, reused for every STARTTLS
+
+
+def _get_tls_context():
+    """Return the shared SSL context (CA bundle is loaded only once)."""
+    global _tls_context
+    if _tls_context is None:
+        import ssl
+        _tls_context = ssl.create_default_context()
+    return _tls_context
+
 
 def _send_email(subject: str, body: str) -> bool:
     """Internal helper – send a plain-text email via Gmail SMTP."""
@@ -27,6 +35,11 @@ def _send_email(subject: str, body: str) -> bool:
         logger.warning("Email credentials not set – skipping notification.")
         return False
 
+    # Imported lazily: SMTP/MIME are only needed once an email is actually sent
+    import smtplib
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
     try:
         msg = MIMEMultipart("alternative")
         msg["Subject"] = subject
@@ -36,7 +49,7 @@ def _send_email(subject: str, body: str) -> bool:
 
         with smtplib.SMTP(cfg.SMTP_HOST, cfg.SMTP_PORT) as server:
             server.ehlo()
-            server.starttls()
+            server.starttls(context=_get_tls_context())
             server.login(cfg.EMAIL_SENDER, cfg.EMAIL_APP_PASSWORD)
             server.sendmail(cfg.EMAIL_SENDER, cfg.EMAIL_RECEIVER, msg.as_string())
 
@@ -48,29 +61,99 @@ def _send_email(subject: str, body: str) -> bool:
         return False
 
 
+# ── Message templates ────────────────────────────────────────────────────────
+# Bound str.format methods, one per notification; each notify_* fills its own.
+
+_BOT_STARTED_BODY = (
+    "Upstox Auto Trading Bot started at {now}.\n\n"
+    "Capital      : ₹{capital:.0f}\n"
+    "Leverage     : {leverage}x MIS\n"
+    "Profit Target: ₹{profit_target:.0f}\n"
+    "Max Loss     : ₹{max_loss:.0f}\n"
+    "Strategy     : Opening Range Breakout + EMA + RSI\n"
+    "Exit by      : {exit_time} IST\n"
+).format
+
+_STOCK_SELECTED_BODY = (
+    "Stock selected for today's trading:\n\n"
+    "Instrument : {instrument_key}\n"
+    "LTP        : ₹{ltp:.2f}\n"
+    "ATR        : ₹{atr:.2f} ({atr_pct:.3f}%)\n"
+    "Avg Volume : {vol_ma:.0f}\n"
+).format
+
+_TRADE_ENTRY_BODY = (
+    "BUY order placed!\n\n"
+    "Instrument : {instrument_key}\n"
+    "Entry Price: ₹{entry_price:.2f}\n"
+    "Quantity   : {quantity}\n"
+    "Stop Loss  : ₹{stop_loss:.2f} (-{stop_loss_pct:.1f}%)\n"
+    "Target     : ₹{target:.2f} (+{target_pct:.1f}%)\n"
+    "Reason     : {reason}\n"
+    "Position   : ₹{position_value:.2f}\n"
+).format
+
+_TRADE_EXIT_SUBJECT = "[Auto-Trader] SELL – {outcome} ₹{pnl:.2f}".format
+_TRADE_EXIT_BODY = (
+    "SELL order placed ({outcome})!\n\n"
+    "Instrument : {instrument_key}\n"
+    "Entry      : ₹{entry_price:.2f}\n"
+    "Exit       : ₹{exit_price:.2f}\n"
+    "Quantity   : {quantity}\n"
+    "Trade P&L  : ₹{pnl:.2f}\n"
+    "Total P&L  : ₹{total_pnl:.2f}\n"
+    "Reason     : {reason}\n"
+).format
+
+_PROFIT_TARGET_BODY = (
+    "Daily profit target of ₹{profit_target:.0f} has been reached!\n\n"
+    "Total P&L today: ₹{total_pnl:.2f}\n\n"
+    "The bot will not place any more orders today.\n"
+    "All positions will be exited by {exit_time} IST.\n"
+).format
+
+_MAX_LOSS_BODY = (
+    "Daily max loss limit of ₹{max_loss:.0f} has been reached.\n\n"
+    "Total P&L today: ₹{total_pnl:.2f}\n\n"
+    "The bot has stopped all trading to protect your capital.\n"
+    "All positions will be exited immediately.\n"
+).format
+
+_DAILY_SUMMARY_BODY = (
+    "Auto Trading Bot – End-of-Day Summary\n"
+    + "=" * 40 + "\n\n"
+    "{summary_text}\n\n"
+    "Check your Upstox app for full trade history.\n"
+).format
+
+_ERROR_BODY = (
+    "An error occurred in the Auto Trading Bot:\n\n"
+    "{error_msg}\n\n"
+    "Please check the GitHub Actions logs for details.\n"
+).format
+
+
 # ── Public notification functions ────────────────────────────────────────────
 
 def notify_bot_started() -> None:
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    body = (
-        f"Upstox Auto Trading Bot started at {now}.\n\n"
-        f"Capital      : ₹{cfg.TRADING_CAPITAL:.0f}\n"
-        f"Leverage     : {cfg.MIS_LEVERAGE}x MIS\n"
-        f"Profit Target: ₹{cfg.DAILY_PROFIT_TARGET:.0f}\n"
-        f"Max Loss     : ₹{cfg.DAILY_MAX_LOSS:.0f}\n"
-        f"Strategy     : Opening Range Breakout + EMA + RSI\n"
-        f"Exit by      : {cfg.FORCE_EXIT_TIME} IST\n"
+    body = _BOT_STARTED_BODY(
+        now=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        capital=cfg.TRADING_CAPITAL,
+        leverage=cfg.MIS_LEVERAGE,
+        profit_target=cfg.DAILY_PROFIT_TARGET,
+        max_loss=cfg.DAILY_MAX_LOSS,
+        exit_time=cfg.FORCE_EXIT_TIME,
     )
     _send_email("[Auto-Trader] Bot Started", body)
 
 
 def notify_stock_selected(stock: dict) -> None:
-    body = (
-        f"Stock selected for today's trading:\n\n"
-        f"Instrument : {stock.get('instrument_key', 'N/A')}\n"
-        f"LTP        : ₹{stock.get('ltp', 0):.2f}\n"
-        f"ATR        : ₹{stock.get('atr', 0):.2f} ({stock.get('atr_pct', 0):.3f}%)\n"
-        f"Avg Volume : {stock.get('vol_ma', 0):.0f}\n"
+    body = _STOCK_SELECTED_BODY(
+        instrument_key=stock.get("instrument_key", "N/A"),
+        ltp=stock.get("ltp", 0),
+        atr=stock.get("atr", 0),
+        atr_pct=stock.get("atr_pct", 0),
+        vol_ma=stock.get("vol_ma", 0),
     )
     _send_email("[Auto-Trader] Stock Selected", body)
 
@@ -83,15 +166,16 @@ def notify_trade_entry(
     target: float,
     reason: str,
 ) -> None:
-    body = (
-        f"BUY order placed!\n\n"
-        f"Instrument : {instrument_key}\n"
-        f"Entry Price: ₹{entry_price:.2f}\n"
-        f"Quantity   : {quantity}\n"
-        f"Stop Loss  : ₹{stop_loss:.2f} (-{cfg.STOP_LOSS_PCT*100:.1f}%)\n"
-        f"Target     : ₹{target:.2f} (+{cfg.TARGET_PCT*100:.1f}%)\n"
-        f"Reason     : {reason}\n"
-        f"Position   : ₹{entry_price * quantity:.2f}\n"
+    body = _TRADE_ENTRY_BODY(
+        instrument_key=instrument_key,
+        entry_price=entry_price,
+        quantity=quantity,
+        stop_loss=stop_loss,
+        stop_loss_pct=cfg.STOP_LOSS_PCT * 100,
+        target=target,
+        target_pct=cfg.TARGET_PCT * 100,
+        reason=reason,
+        position_value=entry_price * quantity,
     )
     _send_email("[Auto-Trader] BUY Order Placed", body)
 
@@ -105,55 +189,37 @@ def notify_trade_exit(
     reason: str,
     total_pnl: float,
 ) -> None:
-    emoji = "PROFIT" if pnl >= 0 else "LOSS"
-    body = (
-        f"SELL order placed ({emoji})!\n\n"
-        f"Instrument : {instrument_key}\n"
-        f"Entry      : ₹{entry_price:.2f}\n"
-        f"Exit       : ₹{exit_price:.2f}\n"
-        f"Quantity   : {quantity}\n"
-        f"Trade P&L  : ₹{pnl:.2f}\n"
-        f"Total P&L  : ₹{total_pnl:.2f}\n"
-        f"Reason     : {reason}\n"
+    outcome = "PROFIT" if pnl >= 0 else "LOSS"
+    body = _TRADE_EXIT_BODY(
+        outcome=outcome,
+        instrument_key=instrument_key,
+        entry_price=entry_price,
+        exit_price=exit_price,
+        quantity=quantity,
+        pnl=pnl,
+        total_pnl=total_pnl,
+        reason=reason,
     )
-    _send_email(f"[Auto-Trader] SELL – {emoji} ₹{pnl:.2f}", body)
+    _send_email(_TRADE_EXIT_SUBJECT(outcome=outcome, pnl=pnl), body)
 
 
 def notify_profit_target_hit(total_pnl: float) -> None:
-    body = (
-        f"Daily profit target of ₹{cfg.DAILY_PROFIT_TARGET:.0f} has been reached!\n\n"
-        f"Total P&L today: ₹{total_pnl:.2f}\n\n"
-        f"The bot will not place any more orders today.\n"
-        f"All positions will be exited by {cfg.FORCE_EXIT_TIME} IST.\n"
+    body = _PROFIT_TARGET_BODY(
+        profit_target=cfg.DAILY_PROFIT_TARGET,
+        total_pnl=total_pnl,
+        exit_time=cfg.FORCE_EXIT_TIME,
     )
     _send_email("[Auto-Trader] Profit Target Reached!", body)
 
 
 def notify_max_loss_hit(total_pnl: float) -> None:
-    body = (
-        f"Daily max loss limit of ₹{cfg.DAILY_MAX_LOSS:.0f} has been reached.\n\n"
-        f"Total P&L today: ₹{total_pnl:.2f}\n\n"
-        f"The bot has stopped all trading to protect your capital.\n"
-        f"All positions will be exited immediately.\n"
-    )
+    body = _MAX_LOSS_BODY(max_loss=cfg.DAILY_MAX_LOSS, total_pnl=total_pnl)
     _send_email("[Auto-Trader] Max Loss Limit Hit – Trading Stopped", body)
 
 
 def notify_daily_summary(summary_text: str) -> None:
-    body = (
-        "Auto Trading Bot – End-of-Day Summary\n"
-        "=" * 40 + "\n\n"
-        + summary_text
-        + "\n\n"
-        + "Check your Upstox app for full trade history.\n"
-    )
-    _send_email("[Auto-Trader] Daily Summary", body)
+    _send_email("[Auto-Trader] Daily Summary", _DAILY_SUMMARY_BODY(summary_text=summary_text))
 
 
 def notify_error(error_msg: str) -> None:
-    body = (
-        f"An error occurred in the Auto Trading Bot:\n\n"
-        f"{error_msg}\n\n"
-        f"Please check the GitHub Actions logs for details.\n"
-    )
-    _send_email("[Auto-Trader] ERROR – Check Logs", body)
+    _send_email("[Auto-Trader] ERROR – Check Logs", _ERROR_BODY(error_msg=error_msg))
@@ -3,14 +3,17 @@ Order Manager – places and tracks buy/sell orders via the Upstox v2 REST API.
 
 Order types used:
   - MARKET order (instant fill at best available price)
-  - Product type: I (Intraday) for intraday leverage
+  - Product type: I (Intraday) for intraday leverage by default; set via
+    OrderManager(product=...) for other Upstox product codes
 """
 
 from __future__ import annotations
 
+import json
 import logging
 import time
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Optional
 
 import config.settings as cfg
@@ -18,9 +21,14 @@ from src.strategy import Signal
 
 logger = logging.getLogger(__name__)
 
+# Reverse side to square off a position, indexed by ``quantity > 0``
+# (long → SELL, short → BUY).
+_EXIT_TXN = ("BUY", "SELL")
+
 
 class OrderManager:
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, product: str = "I"):
+        self._product = product   # Upstox product code baked into every order
         self._headers = {
             "accept":        "application/json",
             "Content-Type":  "application/json",
@@ -29,6 +37,13 @@ class OrderManager:
         }
         self._placed_orders: list[dict] = []  # history of placed orders today
 
+        # One keep-alive session for all order/status/position calls, so the
+        # fill-polling loop and force-exits reuse pooled TLS connections.
+        self._session = requests.Session()
+        self._session.headers.update(self._headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16)
+        self._session.mount("https://", adapter)
+
     # ── Order Placement ───────────────────────────────────────────────────────
 
     def place_order(
@@ -37,7 +52,7 @@ class OrderManager:
         transaction_type: str,   # "BUY" or "SELL"
     ) -> Optional[str]:
         """
-        Place a MARKET Intraday order.
+        Place a MARKET order for the configured product (Intraday by default).
 
         Args:
             signal: Signal object with instrument_key, quantity, ltp.
@@ -52,7 +67,7 @@ class OrderManager:
 
         payload = {
             "quantity":         signal.quantity,
-            "product":          "I",            # Intraday order (Upstox v2)
+            "product":          self._product,  # "I" = Intraday (Upstox v2)
             "validity":         "DAY",
             "price":            0,              # 0 = market price
             "tag":              "auto_bot",
@@ -64,9 +79,12 @@ class OrderManager:
             "is_amo":           False,
         }
 
+        # Serialise once, compactly; the session already sends Content-Type: JSON
+        body = json.dumps(payload, separators=(",", ":"))
+
         url = f"{cfg.UPSTOX_BASE_URL}/order/place"
         try:
-            resp = requests.post(url, json=payload, headers=self._headers, timeout=15)
+            resp = self._session.post(url, data=body, timeout=15)
             if resp.status_code != 200:
                 logger.error(
                     "Order placement failed [%d]: %s | payload: %s",
@@ -86,7 +104,7 @@ class OrderManager:
             "transaction_type": transaction_type,
             "quantity":        signal.quantity,
             "ltp_at_signal":   signal.ltp,
-            "reason":          signal.reason,
+            "reason":          str(signal.reason),
         }
         self._placed_orders.append(record)
 
@@ -107,7 +125,7 @@ class OrderManager:
         url = f"{cfg.UPSTOX_BASE_URL}/order/details"
         params = {"order_id": order_id}
         try:
-            resp = requests.get(url, headers=self._headers, params=params, timeout=10)
+            resp = self._session.get(url, params=params, timeout=10)
             resp.raise_for_status()
             return resp.json().get("data", {})
         except Exception as exc:
@@ -139,7 +157,7 @@ class OrderManager:
         """Return current open intraday positions."""
         url = f"{cfg.UPSTOX_BASE_URL}/portfolio/short-term-positions"
         try:
-            resp = requests.get(url, headers=self._headers, timeout=10)
+            resp = self._session.get(url, timeout=10)
             resp.raise_for_status()
             raw = resp.json()
             logger.info("Positions API response: %s", raw)
@@ -157,7 +175,7 @@ class OrderManager:
         # ── Method 1: Use Upstox bulk exit endpoint ─────────────────────────
         url = f"{cfg.UPSTOX_BASE_URL}/order/positions/exit"
         try:
-            resp = requests.post(url, headers=self._headers, timeout=15)
+            resp = self._session.post(url, timeout=15)
             if resp.status_code in (200, 207):
                 data = resp.json()
                 order_ids = data.get("data", {}).get("order_ids", [])
@@ -191,25 +209,18 @@ class OrderManager:
             logger.warning("No open positions returned from Upstox API – nothing to exit.")
             return
 
-        exited = 0
-        for pos in positions:
-            qty       = abs(int(pos.get("quantity", 0)))
-            inst_key  = pos.get("instrument_token", "")
-            side      = pos.get("quantity", 0)  # positive = long, negative = short
-
-            if qty == 0:
-                continue
-
-            transaction_type = "SELL" if side > 0 else "BUY"  # reverse to exit
+        # Build every exit order up front so the loop below only does network work
+        orders = [
+            order for order in (_exit_order(pos, "force-exit") for pos in positions)
+            if order is not None
+        ]
 
-            dummy_signal = type("S", (), {
-                "instrument_key": inst_key,
-                "quantity": qty,
-                "ltp": pos.get("last_price", 0),
-                "reason": "force-exit",
-            })()
+        exited = 0
+        for transaction_type, exit_signal in orders:
+            inst_key = exit_signal.instrument_key
+            qty      = exit_signal.quantity
 
-            order_id = self.place_order(dummy_signal, transaction_type)   # type: ignore
+            order_id = self.place_order(exit_signal, transaction_type)
             if order_id:
                 fill = self.wait_for_fill(order_id)
                 if fill:
@@ -239,26 +250,19 @@ class OrderManager:
         positions = self.get_positions()
         open_count = 0
         for pos in positions:
-            qty = abs(int(pos.get("quantity", 0)))
-            if qty > 0:
-                open_count += 1
-                inst_key = pos.get("instrument_token", "")
-                logger.error(
-                    "POSITION STILL OPEN after exit: %s × %d – attempting manual close.",
-                    inst_key, qty,
-                )
-                # Last-resort retry
-                side = pos.get("quantity", 0)
-                transaction_type = "SELL" if side > 0 else "BUY"
-                dummy_signal = type("S", (), {
-                    "instrument_key": inst_key,
-                    "quantity": qty,
-                    "ltp": pos.get("last_price", 0),
-                    "reason": "emergency-exit-retry",
-                })()
-                order_id = self.place_order(dummy_signal, transaction_type)
-                if order_id:
-                    self.wait_for_fill(order_id, max_wait=20)
+            order = _exit_order(pos, "emergency-exit-retry")
+            if order is None:
+                continue
+            transaction_type, exit_signal = order
+            open_count += 1
+            logger.error(
+                "POSITION STILL OPEN after exit: %s × %d – attempting manual close.",
+                exit_signal.instrument_key, exit_signal.quantity,
+            )
+            # Last-resort retry
+            order_id = self.place_order(exit_signal, transaction_type)
+            if order_id:
+                self.wait_for_fill(order_id, max_wait=20)
 
         if open_count == 0:
             logger.info("Position verification: all positions confirmed closed.")
@@ -269,3 +273,22 @@ class OrderManager:
 
     def get_today_orders(self) -> list[dict]:
         return self._placed_orders
+
+
+# ── Helpers ──────────────────────────────────────────────────────────────────
+
+def _exit_order(pos: dict, reason: str) -> Optional[tuple[str, Signal]]:
+    """
+    Return (transaction_type, signal) that squares off a broker position,
+    or None if the position is already flat.  Quantity is parsed once:
+    positive = long (exit with SELL), negative = short (exit with BUY).
+    """
+    raw = int(pos.get("quantity", 0) or 0)
+    if raw == 0:
+        return None
+    exit_signal = Signal(
+        "EXIT", pos.get("instrument_token", ""), reason,
+        float(pos.get("last_price", 0) or 0), abs(raw),
+        side="BUY" if raw > 0 else "SHORT",
+    )
+    return _EXIT_TXN[raw > 0], exit_signal
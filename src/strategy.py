@@ -28,20 +28,121 @@ from __future__ import annotations
 import logging
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional
+from typing import NamedTuple, Optional
 
+import numpy as np
 import pandas as pd
 
 import config.settings as cfg
+from src import _strategy_kernel as _kernel
 
 logger = logging.getLogger(__name__)
 
+# Side sign (Position.side_sign, ORBPortfolio.side) → order side name
+_SIDE_NAME = {1: "BUY", -1: "SHORT"}
+
+
+# ── Config mirrors ───────────────────────────────────────────────────────────
+# Module-level copies of the cfg values read on the per-candle paths, so hot
+# code loads a global instead of an attribute of config.settings.  They are
+# the only place the strategy reads its thresholds from: after changing cfg
+# (e.g. in a backtest parameter sweep) call _reload_config(), and every
+# ORBStrategy / ORBPortfolio, existing or new, uses the new values.
+
+def _reload_config() -> None:
+    global _TRAIL_ATR_MULT, _ATR_STOP_MULT, _ATR_TARGET_MULT, _STOP_LOSS_PCT, _TARGET_PCT
+    global _QTY_K_ATR, _QTY_K_PCT, _MIN_BARS, _EMA_FAST_COL, _EMA_SLOW_COL, _BAR_SPEC
+    global _RSI_BUY_MIN, _RSI_BUY_MAX, _RSI_SELL_MIN, _RSI_SELL_MAX, _VOL_MULT
+    global _BREAKOUT_BUFFER_PCT, _MIN_OR_RANGE_PCT, _MIN_ATR_PCT, _USE_VWAP
+    global _KERNEL_CFG, _evaluate_signal
+
+    _TRAIL_ATR_MULT  = cfg.TRAILING_ATR_MULTIPLIER
+    _ATR_STOP_MULT   = cfg.ATR_STOP_MULTIPLIER
+    _ATR_TARGET_MULT = cfg.ATR_TARGET_MULTIPLIER
+    _STOP_LOSS_PCT   = cfg.STOP_LOSS_PCT
+    _TARGET_PCT      = cfg.TARGET_PCT
+
+    # RISK_PER_TRADE / (x × k) == (RISK_PER_TRADE / k) / x, so fold the
+    # constant part once and size a trade with a single division.  A
+    # non-positive multiplier leaves K at 0, which sizes to 0 shares.
+    _QTY_K_ATR = cfg.RISK_PER_TRADE / _ATR_STOP_MULT if _ATR_STOP_MULT > 0 else 0.0
+    _QTY_K_PCT = cfg.RISK_PER_TRADE / _STOP_LOSS_PCT if _STOP_LOSS_PCT > 0 else 0.0
+
+    # Warm-up length and the columns MarketData.add_indicators() writes, in
+    # _latest_bar() order, each with the value used while it is still NaN
+    # (close has no fallback; _latest_bar() also applies vol_ma's to 0)
+    _MIN_BARS     = cfg.EMA_SLOW + 5
+    _EMA_FAST_COL = f"ema_{cfg.EMA_FAST}"
+    _EMA_SLOW_COL = f"ema_{cfg.EMA_SLOW}"
+    _BAR_SPEC     = (
+        ("close", float("nan")), (_EMA_FAST_COL, 0.0), (_EMA_SLOW_COL, 0.0),
+        ("rsi", 50.0), ("volume", 0.0), ("vol_ma", 1.0), ("atr", 0.0), ("vwap", 0.0),
+    )
+
+    # Entry filter thresholds
+    _RSI_BUY_MIN         = cfg.RSI_BUY_MIN
+    _RSI_BUY_MAX         = cfg.RSI_BUY_MAX
+    _RSI_SELL_MIN        = cfg.RSI_SELL_MIN
+    _RSI_SELL_MAX        = cfg.RSI_SELL_MAX
+    _VOL_MULT            = cfg.VOLUME_MULTIPLIER
+    _BREAKOUT_BUFFER_PCT = cfg.BREAKOUT_BUFFER_PCT
+    _MIN_OR_RANGE_PCT    = cfg.MIN_OR_RANGE_PCT
+    _MIN_ATR_PCT         = cfg.MIN_ATR_PCT
+    _USE_VWAP            = cfg.USE_VWAP_FILTER
+
+    # The same thresholds in the kernel's argument order, for evaluate_batch()
+    # and for the evaluate_signal() specialised to them, so each per-candle
+    # call passes only bar and position state
+    _KERNEL_CFG = (
+        _RSI_BUY_MIN, _RSI_BUY_MAX, _RSI_SELL_MIN, _RSI_SELL_MAX,
+        _VOL_MULT, _BREAKOUT_BUFFER_PCT, _MIN_OR_RANGE_PCT, _MIN_ATR_PCT, _USE_VWAP,
+    )
+    _evaluate_signal = _kernel.make_evaluator(*_KERNEL_CFG)
+
+
+_reload_config()
+
+
+class LazyStr:
+    """
+    A %-format template and its arguments, rendered the first time str() is
+    called (e.g. by logging, an f-string or str.format) and cached after
+    that.  Used for signal reasons, which are often never read.  It compares
+    and hashes as its rendered text; store str(reason), not the LazyStr,
+    anywhere a plain string is expected (JSON, trade records).
+    """
+    __slots__ = ("fmt", "args", "_text")
+
+    def __init__(self, fmt: str, args: tuple):
+        self.fmt   = fmt
+        self.args  = args
+        self._text: Optional[str] = None
+
+    def __str__(self) -> str:
+        text = self._text
+        if text is None:
+            text = self._text = self.fmt % self.args
+        return text
+
+    def __repr__(self) -> str:
+        return repr(str(self))
+
+    def __format__(self, spec: str) -> str:
+        return format(str(self), spec)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (LazyStr, str)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
 
-@dataclass
-class Signal:
+class Signal(NamedTuple):
     action: str          # "BUY" | "SHORT" | "HOLD" | "EXIT"
     instrument_key: str
-    reason: str
+    reason: str | LazyStr  # LazyStr renders on first str(); str() it to store
     ltp: float           # Last traded price at signal time
     quantity: int        # Suggested order quantity (0 if HOLD)
     stop_loss: float = 0.0
@@ -49,7 +150,7 @@ class Signal:
     side: str        = "BUY"   # "BUY" or "SHORT"
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     instrument_key: str
     entry_price: float
@@ -57,73 +158,53 @@ class Position:
     stop_loss: float
     target: float
     side: str = "BUY"          # "BUY" (long) or "SHORT" (short)
-    entry_time: datetime = field(default_factory=datetime.now)
+    entry_time: Optional[datetime] = None   # timestamp of the entry candle
     initial_risk: float = 0.0  # distance from entry to initial stop (for trailing)
     peak_price: float = 0.0    # highest price since entry (BUY) or lowest (SHORT)
     trailing_active: bool = False  # True once trade reaches 1R profit
+    side_sign: int = field(init=False)  # +1 for BUY, -1 for SHORT
+    # (stop before, stop after, peak) for each trailing-stop ratchet, logged
+    # once at exit
+    trail_moves: list[tuple[float, float, float]] = field(
+        default_factory=list, init=False, repr=False,
+    )
+
+    def __post_init__(self) -> None:
+        self.side_sign = 1 if self.side == "BUY" else -1
 
     @property
     def position_value(self) -> float:
         return self.entry_price * self.quantity
 
     def unrealised_pnl(self, ltp: float) -> float:
-        if self.side == "BUY":
-            return (ltp - self.entry_price) * self.quantity
-        else:  # SHORT
-            return (self.entry_price - ltp) * self.quantity
+        return (ltp - self.entry_price) * self.side_sign * self.quantity
 
     def update_trailing(self, ltp: float, atr: float) -> None:
         """Update trailing stop logic. Called every candle."""
-        if self.side == "BUY":
-            # Track peak price
-            if ltp > self.peak_price:
-                self.peak_price = ltp
-
-            # Activate trailing after 1R profit
-            if not self.trailing_active and self.initial_risk > 0:
-                if ltp >= self.entry_price + self.initial_risk:
-                    self.trailing_active = True
-                    # Move stop to breakeven + small buffer
-                    self.stop_loss = round(self.entry_price + 0.10, 2)
-                    logger.info(
-                        "[%s] Trailing activated! Stop moved to breakeven %.2f",
-                        self.instrument_key, self.stop_loss,
-                    )
-
-            # Trail stop at 1.5 × ATR below peak
-            if self.trailing_active and atr > 0:
-                trail_stop = round(self.peak_price - cfg.TRAILING_ATR_MULTIPLIER * atr, 2)
-                if trail_stop > self.stop_loss:
-                    self.stop_loss = trail_stop
-                    logger.info(
-                        "[%s] Trailing stop updated to %.2f (peak=%.2f)",
-                        self.instrument_key, self.stop_loss, self.peak_price,
-                    )
-
-        else:  # SHORT
-            # Track lowest price (peak for shorts)
-            if self.peak_price == 0 or ltp < self.peak_price:
-                self.peak_price = ltp
-
-            # Activate trailing after 1R profit
-            if not self.trailing_active and self.initial_risk > 0:
-                if ltp <= self.entry_price - self.initial_risk:
-                    self.trailing_active = True
-                    self.stop_loss = round(self.entry_price - 0.10, 2)
-                    logger.info(
-                        "[%s] Trailing activated! Stop moved to breakeven %.2f",
-                        self.instrument_key, self.stop_loss,
-                    )
-
-            # Trail stop at 1.5 × ATR above lowest
-            if self.trailing_active and atr > 0:
-                trail_stop = round(self.peak_price + cfg.TRAILING_ATR_MULTIPLIER * atr, 2)
-                if trail_stop < self.stop_loss:
-                    self.stop_loss = trail_stop
-                    logger.info(
-                        "[%s] Trailing stop updated to %.2f (peak=%.2f)",
-                        self.instrument_key, self.stop_loss, self.peak_price,
-                    )
+        prev_stop = self.stop_loss
+        self.peak_price, self.stop_loss, self.trailing_active, events = _kernel.update_trailing(
+            self.side_sign, ltp, self.entry_price, self.initial_risk, self.peak_price,
+            prev_stop, self.trailing_active, atr, _TRAIL_ATR_MULT,
+        )
+        if events & _kernel.TRAIL_ACTIVATED:
+            # The stop the kernel set: breakeven, or already past it if the
+            # trail ratcheted on the same candle
+            logger.info(
+                "[%s] Trailing activated! Stop moved to %.2f",
+                self.instrument_key, self.stop_loss,
+            )
+        if events & _kernel.TRAIL_MOVED:
+            self.trail_moves.append((prev_stop, self.stop_loss, self.peak_price))
+
+    def flush_trail_log(self) -> None:
+        """Log the trailing-stop ratchets buffered since entry as one line."""
+        moves = self.trail_moves
+        if moves:
+            logger.info(
+                "[%s] Trailing stop moved %d time(s): %.2f → %.2f (last peak=%.2f)",
+                self.instrument_key, len(moves), moves[0][0], moves[-1][1], moves[-1][2],
+            )
+            moves.clear()
 
 
 class ORBStrategy:
@@ -135,17 +216,28 @@ class ORBStrategy:
 
     def __init__(self, instrument_key: str):
         self.instrument_key   = instrument_key
-        self.or_high: Optional[float] = None
-        self.or_low:  Optional[float] = None
+        # ±inf until set_opening_range(), so the levels are always plain
+        # floats; or_established is what gates entries
+        self.or_high: float = float("-inf")
+        self.or_low:  float = float("inf")
         self.or_established   = False
         self.position: Optional[Position] = None
 
+        # The plain "no action" HOLD never varies for an instrument, so one
+        # shared instance is returned instead of allocating one per candle.
+        self._hold = Signal("HOLD", instrument_key, "no action", 0, 0)
+
+        # Whether the entry-filter debug trace is wanted; re-checked once a day
+        # in set_opening_range so a runtime log-level change is still honoured.
+        self._debug = logger.isEnabledFor(logging.DEBUG)
+
     # ── Opening Range Setup ───────────────────────────────────────────────────
 
     def set_opening_range(self, or_high: float, or_low: float) -> None:
         self.or_high        = or_high
         self.or_low         = or_low
         self.or_established = True
+        self._debug         = logger.isEnabledFor(logging.DEBUG)
         logger.info(
             "[%s] Opening Range set → High: %.2f | Low: %.2f | Range: %.2f",
             self.instrument_key, or_high, or_low, or_high - or_low,
@@ -158,243 +250,199 @@ class ORBStrategy:
         Evaluate the latest candle and return a Signal.
         Uses ATR-based stops, VWAP filter, and trailing stop management.
         """
-        instrument_key = self.instrument_key
-        hold = Signal("HOLD", instrument_key, "no action", 0, 0)
-
-        if df.empty or len(df) < cfg.EMA_SLOW + 5:
-            return hold
+        n_rows = len(df)
+        if n_rows < _MIN_BARS:   # also covers an empty frame
+            return self._hold
+
+        signal = self.generate_signal_from_row(_latest_bar(df), n_rows, available_capital)
+        if signal.action == "BUY" or signal.action == "SHORT":
+            self.position.entry_time = _bar_time(df)
+        return signal
+
+    def generate_signal_from_row(
+        self, row: tuple[float, ...], n_rows: int, available_capital: float,
+    ) -> Signal:
+        """
+        generate_signal() for a caller that already holds the latest bar as a
+        (close, ema_fast, ema_slow, rsi, volume, vol_ma, atr, vwap) tuple and
+        the candle count, e.g. a backtest replaying arrays.  No pandas access;
+        the Position of a new entry has no entry_time.  vol_ma must already
+        be positive (_latest_bar() replaces a NaN or 0 average with 1).
+        """
+        if n_rows < _MIN_BARS:
+            return self._hold
 
-        latest  = df.iloc[-1]
-        close   = float(latest["close"])
-        ema9    = float(latest.get(f"ema_{cfg.EMA_FAST}", 0) or 0)
-        ema21   = float(latest.get(f"ema_{cfg.EMA_SLOW}", 0) or 0)
-        rsi     = float(latest.get("rsi", 50) or 50)
-        volume  = float(latest.get("volume", 0) or 0)
-        vol_ma  = float(latest.get("vol_ma", 1) or 1)
-        atr     = float(latest.get("atr", 0) or 0)
-        vwap    = float(latest.get("vwap", 0) or 0)
+        close, ema9, ema21, rsi, volume, vol_ma, atr, vwap = row
 
         # ── Manage existing position ──────────────────────────────────────────
-        if self.position:
-            p   = self.position
-            pnl = p.unrealised_pnl(close)
-
+        p = self.position
+        if p:
             # Update trailing stop before checking exits
             if atr > 0:
                 p.update_trailing(close, atr)
+            pos_side = p.side_sign
+            stop_loss, target, trailing_active = p.stop_loss, p.target, p.trailing_active
+            or_high = or_low = 0.0          # not used while in a position
+        elif not self.or_established:
+            return self._hold
+        else:
+            # Past the gate the opening range is set
+            pos_side = _kernel.FLAT
+            stop_loss = target = 0.0
+            trailing_active = False
+            or_high, or_low = self.or_high, self.or_low
+
+        code = _evaluate_signal(
+            close, ema9, ema21, rsi, volume, vol_ma, atr, vwap,
+            or_high, or_low,
+            pos_side, stop_loss, target, trailing_active,
+        )
 
-            # Stop-loss hit
-            if p.side == "BUY" and close <= p.stop_loss:
-                sl_type = "trailing" if p.trailing_active else "initial"
-                self.position = None
-                return Signal(
-                    "EXIT", instrument_key,
-                    f"Stop-loss ({sl_type}) hit @ {close:.2f} (entry {p.entry_price:.2f}, P&L ₹{pnl:.2f})",
-                    close, p.quantity, side=p.side,
-                )
-            if p.side == "SHORT" and close >= p.stop_loss:
-                sl_type = "trailing" if p.trailing_active else "initial"
-                self.position = None
-                return Signal(
-                    "EXIT", instrument_key,
-                    f"Stop-loss ({sl_type}) hit @ {close:.2f} (entry {p.entry_price:.2f}, P&L ₹{pnl:.2f})",
-                    close, p.quantity, side=p.side,
-                )
-
-            # Target hit
-            if p.side == "BUY" and close >= p.target:
-                self.position = None
-                return Signal(
-                    "EXIT", instrument_key,
-                    f"Target hit @ {close:.2f} (entry {p.entry_price:.2f}, profit ₹{pnl:.2f})",
-                    close, p.quantity, side=p.side,
-                )
-            if p.side == "SHORT" and close <= p.target:
-                self.position = None
-                return Signal(
-                    "EXIT", instrument_key,
-                    f"Target hit @ {close:.2f} (entry {p.entry_price:.2f}, profit ₹{pnl:.2f})",
-                    close, p.quantity, side=p.side,
-                )
-
-            # EMA reversal exit (trend turned against us) — only if trailing not active
-            if not p.trailing_active:
-                if p.side == "BUY" and ema9 < ema21 and rsi < 40:
-                    self.position = None
-                    return Signal(
-                        "EXIT", instrument_key,
-                        f"EMA reversal exit @ {close:.2f} (ema9={ema9:.2f} < ema21={ema21:.2f})",
-                        close, p.quantity, side=p.side,
-                    )
-                if p.side == "SHORT" and ema9 > ema21 and rsi > 60:
-                    self.position = None
-                    return Signal(
-                        "EXIT", instrument_key,
-                        f"EMA reversal exit @ {close:.2f} (ema9={ema9:.2f} > ema21={ema21:.2f})",
-                        close, p.quantity, side=p.side,
-                    )
+        if p:
+            return self._position_signal(code, p, close, ema9, ema21)
 
-            return Signal(
-                "HOLD", instrument_key,
-                f"In {p.side} position | LTP={close:.2f} | P&L=₹{pnl:.2f} | "
-                f"SL={p.stop_loss:.2f} | Trail={'ON' if p.trailing_active else 'OFF'}",
-                close, 0, side=p.side,
-            )
+        if self._debug:
+            self._log_entry_checks(close, ema9, ema21, rsi, volume, vol_ma, vwap)
 
-        # ── Look for new entry (no open position) ─────────────────────────────
-        if not self.or_established:
-            return hold
+        if code == _kernel.HOLD:
+            return self._hold
 
-        # ── Quality filters: skip low-quality setups ─────────────────────────
-        or_range = (self.or_high or 0) - (self.or_low or 0)
-        or_range_pct = or_range / close if close > 0 else 0
-        atr_pct = atr / close if close > 0 else 0
+        instrument_key = self.instrument_key
 
-        # Skip if Opening Range is too narrow (choppy, fakeout-prone)
-        if or_range_pct < cfg.MIN_OR_RANGE_PCT:
+        if code == _kernel.HOLD_NARROW_RANGE:
+            or_range_pct = (self.or_high - self.or_low) / close if close > 0 else 0
             return Signal(
                 "HOLD", instrument_key,
-                f"OR range too narrow ({or_range_pct:.4f} < {cfg.MIN_OR_RANGE_PCT})",
+                LazyStr("OR range too narrow (%.4f < %s)", (or_range_pct, _MIN_OR_RANGE_PCT)),
                 close, 0,
             )
 
-        # Skip if ATR is too low (noise will dominate)
-        if atr_pct < cfg.MIN_ATR_PCT:
+        if code == _kernel.HOLD_LOW_ATR:
+            atr_pct = atr / close if close > 0 else 0
             return Signal(
                 "HOLD", instrument_key,
-                f"ATR too low ({atr_pct:.4f} < {cfg.MIN_ATR_PCT})",
+                LazyStr("ATR too low (%.4f < %s)", (atr_pct, _MIN_ATR_PCT)),
                 close, 0,
             )
 
-        vol_ok = volume >= vol_ma * cfg.VOLUME_MULTIPLIER
-
-        # VWAP filter
-        vwap_ok_buy  = (not cfg.USE_VWAP_FILTER) or (vwap > 0 and close > vwap)
-        vwap_ok_sell = (not cfg.USE_VWAP_FILTER) or (vwap > 0 and close < vwap)
-
-        # Breakout buffer: price must exceed OR level by a margin (not just 1 tick)
-        breakout_buffer = close * cfg.BREAKOUT_BUFFER_PCT
-
-        # ── BUY: bullish breakout above OR High ───────────────────────────────
-        breakout_up  = close > (self.or_high or 0) + breakout_buffer
-        ema_uptrend  = ema9 > ema21
-        rsi_buy_ok   = cfg.RSI_BUY_MIN <= rsi <= cfg.RSI_BUY_MAX
-
-        logger.debug(
-            "[%s] BUY check → close=%.2f OR_H=%.2f breakout=%s ema_up=%s rsi=%.1f "
-            "vol_ok=%s vwap_ok=%s",
-            instrument_key, close, self.or_high or 0,
-            breakout_up, ema_uptrend, rsi, vol_ok, vwap_ok_buy,
-        )
-
-        if breakout_up and ema_uptrend and rsi_buy_ok and vol_ok and vwap_ok_buy:
-            # Calculate ATR-based or fallback stop/target
-            stop_loss, target, initial_risk = _calc_stop_target(close, atr, "BUY")
+        if code == _kernel.BUY or code == _kernel.SHORT:
+            side = "BUY" if code == _kernel.BUY else "SHORT"
+            # Size first: with no capital (e.g. another position is open) the
+            # entry is dropped before any stop / target work
             qty = _calc_quantity(close, available_capital, atr)
             if qty < 1:
                 return Signal(
                     "HOLD", instrument_key,
-                    f"BUY signal valid but insufficient capital ({available_capital:.0f})",
+                    LazyStr(
+                        "%s signal valid but insufficient capital (%.0f)", (side, available_capital),
+                    ),
                     close, 0,
                 )
+            # Calculate ATR-based or fallback stop/target
+            stop_loss, target, initial_risk = _calc_stop_target(close, atr, side)
             self.position = Position(
                 instrument_key=instrument_key,
                 entry_price=close,
                 quantity=qty,
                 stop_loss=stop_loss,
                 target=target,
-                side="BUY",
+                side=side,
                 initial_risk=initial_risk,
                 peak_price=close,
             )
+            if side == "BUY":
+                or_level = self.or_high
+                vwap_ok  = (not _USE_VWAP) or (vwap > 0 and close > vwap)
+            else:
+                or_level = self.or_low
+                vwap_ok  = (not _USE_VWAP) or (vwap > 0 and close < vwap)
             return Signal(
-                "BUY", instrument_key,
-                (
-                    f"ORB breakout above {self.or_high:.2f} | "
-                    f"EMA9={ema9:.2f} EMA21={ema21:.2f} | RSI={rsi:.1f} | Vol OK | "
-                    f"VWAP={'OK' if vwap_ok_buy else 'N/A'} | "
-                    f"SL={stop_loss:.2f} TGT={target:.2f} ATR={atr:.2f}"
-                ),
-                close, qty, stop_loss, target, side="BUY",
+                side, instrument_key,
+                _entry_reason(side, or_level, ema9, ema21, rsi, vwap_ok, stop_loss, target, atr),
+                close, qty, stop_loss, target, side=side,
             )
 
-        # Log near-miss BUY for diagnostics (at least breakout happened)
-        if breakout_up:
-            fails = []
-            if not ema_uptrend:  fails.append(f"EMA({ema9:.1f}<={ema21:.1f})")
-            if not rsi_buy_ok:   fails.append(f"RSI({rsi:.1f} not in {cfg.RSI_BUY_MIN}-{cfg.RSI_BUY_MAX})")
-            if not vol_ok:       fails.append(f"Vol({volume:.0f}<{vol_ma*cfg.VOLUME_MULTIPLIER:.0f})")
-            if not vwap_ok_buy:  fails.append("VWAP")
-            if fails:
-                return Signal(
-                    "HOLD", instrument_key,
-                    f"BUY breakout but blocked: {', '.join(fails)}",
-                    close, 0,
-                )
-
-        # ── SHORT: bearish breakdown below OR Low ─────────────────────────────
-        breakdown_dn  = close < (self.or_low or 0) - breakout_buffer
-        ema_downtrend = ema9 < ema21
-        rsi_sell_ok   = cfg.RSI_SELL_MIN <= rsi <= cfg.RSI_SELL_MAX
-
-        logger.debug(
-            "[%s] SHORT check → close=%.2f OR_L=%.2f breakdown=%s ema_dn=%s rsi=%.1f "
-            "vol_ok=%s vwap_ok=%s",
-            instrument_key, close, self.or_low or 0,
-            breakdown_dn, ema_downtrend, rsi, vol_ok, vwap_ok_sell,
+        # Near-miss breakout / breakdown: report which filters blocked it
+        vol_ok = volume >= vol_ma * _VOL_MULT
+        fails = []
+        if code == _kernel.HOLD_BUY_BLOCKED:
+            if not ema9 > ema21:
+                fails.append(f"EMA({ema9:.1f}<={ema21:.1f})")
+            if not _RSI_BUY_MIN <= rsi <= _RSI_BUY_MAX:
+                fails.append(f"RSI({rsi:.1f} not in {_RSI_BUY_MIN}-{_RSI_BUY_MAX})")
+            if not vol_ok:
+                fails.append(f"Vol({volume:.0f}<{vol_ma*_VOL_MULT:.0f})")
+            if not ((not _USE_VWAP) or (vwap > 0 and close > vwap)):
+                fails.append("VWAP")
+            label = "BUY breakout"
+        else:  # HOLD_SHORT_BLOCKED
+            if not ema9 < ema21:
+                fails.append(f"EMA({ema9:.1f}>={ema21:.1f})")
+            if not _RSI_SELL_MIN <= rsi <= _RSI_SELL_MAX:
+                fails.append(f"RSI({rsi:.1f} not in {_RSI_SELL_MIN}-{_RSI_SELL_MAX})")
+            if not vol_ok:
+                fails.append(f"Vol({volume:.0f}<{vol_ma*_VOL_MULT:.0f})")
+            if not ((not _USE_VWAP) or (vwap > 0 and close < vwap)):
+                fails.append("VWAP")
+            label = "SHORT breakdown"
+        return Signal(
+            "HOLD", instrument_key,
+            f"{label} but blocked: {', '.join(fails)}",
+            close, 0,
         )
 
-        if breakdown_dn and ema_downtrend and rsi_sell_ok and vol_ok and vwap_ok_sell:
-            stop_loss, target, initial_risk = _calc_stop_target(close, atr, "SHORT")
-            qty = _calc_quantity(close, available_capital, atr)
-            if qty < 1:
-                return Signal(
-                    "HOLD", instrument_key,
-                    f"SHORT signal valid but insufficient capital ({available_capital:.0f})",
-                    close, 0,
-                )
-            self.position = Position(
-                instrument_key=instrument_key,
-                entry_price=close,
-                quantity=qty,
-                stop_loss=stop_loss,
-                target=target,
-                side="SHORT",
-                initial_risk=initial_risk,
-                peak_price=close,
-            )
+    def _position_signal(
+        self, code: int, p: Position, close: float, ema9: float, ema21: float
+    ) -> Signal:
+        """Turn the kernel's verdict on an open position into a Signal."""
+        instrument_key = self.instrument_key
+        pnl = p.unrealised_pnl(close)
+
+        if code == _kernel.HOLD_POSITION:
             return Signal(
-                "SHORT", instrument_key,
-                (
-                    f"ORB breakdown below {self.or_low:.2f} | "
-                    f"EMA9={ema9:.2f} EMA21={ema21:.2f} | RSI={rsi:.1f} | Vol OK | "
-                    f"VWAP={'OK' if vwap_ok_sell else 'N/A'} | "
-                    f"SL={stop_loss:.2f} TGT={target:.2f} ATR={atr:.2f}"
+                "HOLD", instrument_key,
+                LazyStr(
+                    "In %s position | LTP=%.2f | P&L=₹%.2f | SL=%.2f | Trail=%s",
+                    (p.side, close, pnl, p.stop_loss, "ON" if p.trailing_active else "OFF"),
                 ),
-                close, qty, stop_loss, target, side="SHORT",
+                close, 0, side=p.side,
             )
 
-        # Log near-miss SHORT for diagnostics
-        if breakdown_dn:
-            fails = []
-            if not ema_downtrend: fails.append(f"EMA({ema9:.1f}>={ema21:.1f})")
-            if not rsi_sell_ok:   fails.append(f"RSI({rsi:.1f} not in {cfg.RSI_SELL_MIN}-{cfg.RSI_SELL_MAX})")
-            if not vol_ok:        fails.append(f"Vol({volume:.0f}<{vol_ma*cfg.VOLUME_MULTIPLIER:.0f})")
-            if not vwap_ok_sell:  fails.append("VWAP")
-            if fails:
-                return Signal(
-                    "HOLD", instrument_key,
-                    f"SHORT breakdown but blocked: {', '.join(fails)}",
-                    close, 0,
-                )
-
-        return hold
+        reason = _exit_reason(
+            code, p.side, p.trailing_active, close, p.entry_price, pnl, ema9, ema21,
+        )
+        p.flush_trail_log()
+        self.position = None
+        return Signal("EXIT", instrument_key, reason, close, p.quantity, side=p.side)
+
+    def _log_entry_checks(
+        self, close: float, ema9: float, ema21: float, rsi: float,
+        volume: float, vol_ma: float, vwap: float,
+    ) -> None:
+        """Debug trace of every entry filter (only built when DEBUG is on)."""
+        buffer = close * _BREAKOUT_BUFFER_PCT
+        vol_ok = volume >= vol_ma * _VOL_MULT
+        logger.debug(
+            "[%s] BUY check → close=%.2f OR_H=%.2f breakout=%s ema_up=%s rsi=%.1f "
+            "vol_ok=%s vwap_ok=%s",
+            self.instrument_key, close, self.or_high,
+            close > self.or_high + buffer, ema9 > ema21, rsi, vol_ok,
+            (not _USE_VWAP) or (vwap > 0 and close > vwap),
+        )
+        logger.debug(
+            "[%s] SHORT check → close=%.2f OR_L=%.2f breakdown=%s ema_dn=%s rsi=%.1f "
+            "vol_ok=%s vwap_ok=%s",
+            self.instrument_key, close, self.or_low,
+            close < self.or_low - buffer, ema9 < ema21, rsi, vol_ok,
+            (not _USE_VWAP) or (vwap > 0 and close < vwap),
+        )
 
     def force_exit_signal(self, ltp: float) -> Optional[Signal]:
         """Generate an EXIT signal regardless of P&L (used at 3:10 PM)."""
         if self.position:
             p   = self.position
             pnl = p.unrealised_pnl(ltp)
+            p.flush_trail_log()
             self.position = None
             return Signal(
                 "EXIT", self.instrument_key,
@@ -403,9 +451,310 @@ class ORBStrategy:
             )
         return None
 
+    # ── Batched evaluation ────────────────────────────────────────────────────
+
+    @classmethod
+    def batch_generate_signals(
+        cls,
+        strategies: dict[str, ORBStrategy],
+        frames: dict[str, pd.DataFrame],
+        available_capital: float,
+    ) -> dict[str, Signal]:
+        """
+        Evaluate many instruments at once and return {instrument_key: Signal}.
+
+        The latest bar of every frame is stacked into one (N, 8) array and
+        every flat instrument is run through the signal kernel in a single
+        parallel batch.  Only instruments with an open position or a kernel
+        verdict other than a plain "no action" HOLD go through
+        generate_signal(); the rest get HOLD without any per-row Python
+        branching.  Results are identical to calling generate_signal() on
+        each instrument individually.
+        """
+        keys = [key for key in frames if key in strategies]
+        if not keys:
+            return {}
+
+        strats = [strategies[key] for key in keys]
+        bars   = _stack_latest_bars([frames[key] for key in keys])
+        n      = len(keys)
+
+        ready    = ~np.isnan(bars[:, 0])
+        has_pos  = np.array([s.position is not None for s in strats])
+        or_ready = np.array([s.or_established for s in strats])
+        or_high  = np.array([s.or_high for s in strats], dtype=float)
+        or_low   = np.array([s.or_low  for s in strats], dtype=float)
+
+        # Entry verdicts for everyone as if flat; rows with a position are
+        # re-evaluated by generate_signal() after their trailing-stop update.
+        codes = _kernel.evaluate_batch(
+            bars, or_high, or_low,
+            np.zeros(n, dtype=np.int8), np.zeros(n), np.zeros(n), np.zeros(n, dtype=bool),
+            *_KERNEL_CFG,
+        )
+
+        needs_eval = ready & (has_pos | (or_ready & (codes != _kernel.HOLD)))
+
+        signals = {key: s._hold for key, s in zip(keys, strats)}
+        for i in np.flatnonzero(needs_eval):
+            key = keys[i]
+            signals[key] = strats[i].generate_signal(frames[key], available_capital)
+        return signals
+
+
+class ORBPortfolio:
+    """
+    Structure-of-arrays version of ORBStrategy for evaluating many
+    instruments per bar (scanning / backtests).
+
+    Opening ranges and open positions live in parallel NumPy arrays indexed
+    by instrument slot (see `index`): trailing stops are whole-array
+    operations, and exits and entries for every instrument come from one
+    _kernel.evaluate_batch() call, the same rules as ORBStrategy.  Python
+    objects are only created for instruments that actually produce a BUY,
+    SHORT or EXIT.
+    """
+
+    def __init__(self, instrument_keys: list[str]):
+        self.keys  = list(instrument_keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        n = len(self.keys)
+
+        # Opening range
+        self.or_high = np.full(n, np.nan)
+        self.or_low  = np.full(n, np.nan)
+        self.or_set  = np.zeros(n, dtype=bool)
+
+        # Open positions
+        self.has_pos      = np.zeros(n, dtype=bool)
+        self.side         = np.zeros(n, dtype=np.int8)    # 1 = BUY, -1 = SHORT, 0 = flat
+        self.entry        = np.zeros(n)
+        self.qty          = np.zeros(n, dtype=np.int32)
+        self.sl           = np.zeros(n)
+        self.tgt          = np.zeros(n)
+        self.initial_risk = np.zeros(n)
+        self.peak         = np.zeros(n)
+        self.trailing     = np.zeros(n, dtype=bool)
+
+    # ── State updates ─────────────────────────────────────────────────────────
+
+    def set_or(self, idx: int, or_high: float, or_low: float) -> None:
+        self.or_high[idx] = or_high
+        self.or_low[idx]  = or_low
+        self.or_set[idx]  = True
+
+    def open(
+        self, idx: int, entry: float, qty: int, sl: float, tgt: float,
+        side: str, initial_risk: float = 0.0,
+    ) -> None:
+        self.has_pos[idx]      = True
+        self.side[idx]         = 1 if side == "BUY" else -1
+        self.entry[idx]        = entry
+        self.qty[idx]          = qty
+        self.sl[idx]           = sl
+        self.tgt[idx]          = tgt
+        self.initial_risk[idx] = initial_risk
+        self.peak[idx]         = entry
+        self.trailing[idx]     = False
+
+    def close(self, idx: int) -> None:
+        self.has_pos[idx]  = False
+        self.side[idx]     = 0
+        self.trailing[idx] = False
+
+    # ── Evaluation ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def latest_bars(frames: list[pd.DataFrame]) -> np.ndarray:
+        """Stack the latest bar of each frame into the (N, 8) evaluate_all() input."""
+        return _stack_latest_bars(frames)
+
+    def update_trailing_all(self, ltp: np.ndarray, atr: np.ndarray) -> None:
+        """
+        Position.update_trailing() for every open slot in one pass, written
+        with the side sign so longs and shorts share each comparison.  Slots
+        without a price or ATR this bar are left untouched.
+        """
+        sign = self.side
+        with np.errstate(invalid="ignore"):
+            trail = self.has_pos & ~np.isnan(ltp) & (atr > 0)
+
+            # Track the peak (highest for longs, lowest for shorts)
+            new_peak = trail & ((ltp * sign > self.peak * sign) | ((sign == -1) & (self.peak == 0)))
+            np.copyto(self.peak, ltp, where=new_peak)
+
+            # Activate trailing after 1R profit: stop to breakeven + small buffer
+            activate = trail & ~self.trailing & (self.initial_risk > 0) & (
+                ltp * sign >= (self.entry + sign * self.initial_risk) * sign
+            )
+            np.copyto(self.sl, self.entry + sign * 0.10, where=activate)
+            self.trailing |= activate
+
+            # Ratchet the stop to peak ∓ TRAILING_ATR_MULTIPLIER × ATR
+            trail_stop = self.peak - sign * (_TRAIL_ATR_MULT * atr)
+            np.copyto(self.sl, trail_stop, where=trail & self.trailing & (trail_stop * sign > self.sl * sign))
+
+    def evaluate_all(self, latest_bars: np.ndarray, available_capital: float) -> list[Signal]:
+        """
+        Evaluate one bar for every instrument and return the actionable
+        signals (BUY / SHORT / EXIT), updating the position arrays in place.
+
+        available_capital is the portfolio's total trading capital.  The
+        cost of positions still open after this bar's exits is taken off
+        it, and each new entry is sized, in slot order, against what is
+        left, so simultaneous breakouts never commit more than the total.
+
+        latest_bars is an (N, 8) array of [close, ema_fast, ema_slow, rsi,
+        volume, vol_ma, atr, vwap] in slot order; a NaN close marks an
+        instrument without enough history (it is skipped).
+        """
+        close, ema9, ema21, rsi, _, _, atr, _ = latest_bars.T
+        ready = ~np.isnan(close)
+
+        # Trailing stops move before exits are checked, as in ORBStrategy
+        self.update_trailing_all(close, atr)
+
+        # Exit and entry rules come from the same kernel as ORBStrategy; only
+        # the Signal objects are built here
+        codes = _kernel.evaluate_batch(
+            latest_bars, self.or_high, self.or_low,
+            self.side, self.sl, self.tgt, self.trailing,
+            *_KERNEL_CFG,
+        )
+        live = self.has_pos & ready
+        flat = ready & ~self.has_pos & self.or_set
+
+        signals: list[Signal] = []
+        # EXIT_STOP / EXIT_TARGET / EXIT_REVERSAL are the consecutive codes 3-5
+        exit_mask = live & (codes >= _kernel.EXIT_STOP) & (codes <= _kernel.EXIT_REVERSAL)
+        for i in np.flatnonzero(exit_mask):
+            side  = _SIDE_NAME[self.side[i]]
+            price = float(close[i])
+            qty   = int(self.qty[i])
+            pnl   = (price - self.entry[i]) * qty * self.side[i]
+            reason = _exit_reason(
+                int(codes[i]), side, bool(self.trailing[i]), price,
+                float(self.entry[i]), float(pnl), float(ema9[i]), float(ema21[i]),
+            )
+            signals.append(Signal("EXIT", self.keys[i], reason, price, qty, side=side))
+
+        # Close every exited slot at once (same effect as close() per index)
+        self.has_pos  &= ~exit_mask
+        self.trailing &= ~exit_mask
+        self.side[exit_mask] = 0
+
+        buy_mask   = flat & (codes == _kernel.BUY)
+        short_mask = flat & (codes == _kernel.SHORT)
+
+        # Stops, targets and risk-based sizes for every entry in one array
+        # pass; the capital cap is applied per entry below
+        entries = np.flatnonzero(buy_mask | short_mask)
+        e_sign  = np.where(buy_mask[entries], 1, -1)
+        e_sl, e_tgt, e_risk = _calc_stop_target_vec(close[entries], atr[entries], e_sign)
+        e_qty   = _calc_quantity_vec(close[entries], np.inf, atr[entries])
+
+        remaining = available_capital - float(np.dot(self.entry[self.has_pos], self.qty[self.has_pos]))
+        for j, i in enumerate(entries):
+            price = float(close[i])
+            qty   = min(int(e_qty[j]), int(remaining / price))
+            if qty < 1:
+                continue
+            remaining -= price * qty
+            side  = _SIDE_NAME[e_sign[j]]
+            a     = float(atr[i])
+            stop_loss, target = float(e_sl[j]), float(e_tgt[j])
+            self.open(i, price, qty, stop_loss, target, side, float(e_risk[j]))
+            or_level = self.or_high[i] if e_sign[j] == 1 else self.or_low[i]
+            # The kernel only returns BUY / SHORT once the VWAP filter passed
+            signals.append(Signal(
+                side, self.keys[i],
+                _entry_reason(side, or_level, float(ema9[i]), float(ema21[i]),
+                              float(rsi[i]), True, stop_loss, target, a),
+                price, qty, stop_loss, target, side=side,
+            ))
+        return signals
+
 
 # ── Helpers ──────────────────────────────────────────────────────────────────
 
+def _stack_latest_bars(frames: list[pd.DataFrame]) -> np.ndarray:
+    """
+    (N, 8) array of _latest_bar() rows; frames still in warm-up (fewer than
+    EMA_SLOW + 5 candles) get an all-NaN row.
+    """
+    return np.array(
+        [_latest_bar(df) if len(df) >= _MIN_BARS else (np.nan,) * 8 for df in frames],
+        dtype=float,
+    ).reshape(len(frames), 8)
+
+
+def _entry_reason(
+    side: str, or_level: float, ema9: float, ema21: float, rsi: float,
+    vwap_ok: bool, stop_loss: float, target: float, atr: float,
+) -> LazyStr:
+    setup = "breakout above" if side == "BUY" else "breakdown below"
+    return LazyStr(
+        "ORB %s %.2f | EMA9=%.2f EMA21=%.2f | RSI=%.1f | Vol OK | VWAP=%s | "
+        "SL=%.2f TGT=%.2f ATR=%.2f",
+        (setup, or_level, ema9, ema21, rsi, "OK" if vwap_ok else "N/A", stop_loss, target, atr),
+    )
+
+
+def _exit_reason(
+    code: int, side: str, trailing_active: bool, close: float,
+    entry_price: float, pnl: float, ema9: float, ema21: float,
+) -> LazyStr:
+    if code == _kernel.EXIT_STOP:
+        sl_type = "trailing" if trailing_active else "initial"
+        return LazyStr(
+            "Stop-loss (%s) hit @ %.2f (entry %.2f, P&L ₹%.2f)",
+            (sl_type, close, entry_price, pnl),
+        )
+    if code == _kernel.EXIT_TARGET:
+        return LazyStr(
+            "Target hit @ %.2f (entry %.2f, profit ₹%.2f)", (close, entry_price, pnl),
+        )
+    op = "<" if side == "BUY" else ">"
+    return LazyStr(
+        "EMA reversal exit @ %.2f (ema9=%.2f %s ema21=%.2f)", (close, ema9, op, ema21),
+    )
+
+
+def _latest_bar(df: pd.DataFrame) -> tuple[float, ...]:
+    """
+    Return (close, ema_fast, ema_slow, rsi, volume, vol_ma, atr, vwap) of the
+    last row, read straight from the column ndarrays instead of materialising
+    a row Series with df.iloc[-1].
+
+    The columns are a schema guarantee of MarketData.add_indicators(), which
+    writes all of them once a frame has the EMA_SLOW + 5 candles the
+    strategy needs; a missing column raises KeyError instead of being
+    silently defaulted on every candle.
+    """
+    bar = [_last(df[col].to_numpy(), default) for col, default in _BAR_SPEC]
+    # A zero volume average (halted / untraded stretch) would let a
+    # zero-volume bar pass "volume >= vol_ma × mult", so treat it as missing
+    if not bar[5] > 0:
+        bar[5] = 1.0
+    return tuple(bar)
+
+
+def _bar_time(df: pd.DataFrame) -> Optional[datetime]:
+    """Timestamp of the latest candle (None if the frame has no datetime column)."""
+    if "datetime" not in df.columns:
+        return None
+    return df["datetime"].iat[-1]
+
+
+def _last(arr: np.ndarray, default: float) -> float:
+    """
+    Latest value of an indicator column, or default if it is NaN (indicator
+    still warming up).  A genuine 0 is kept.
+    """
+    val = float(arr[-1])
+    return default if val != val else val
+
+
 def _calc_stop_target(
     price: float, atr: float, side: str
 ) -> tuple[float, float, float]:
@@ -414,20 +763,22 @@ def _calc_stop_target(
     Uses ATR-based calculation when ATR > 0, falls back to fixed %.
     """
     if atr > 0:
-        risk_distance   = atr * cfg.ATR_STOP_MULTIPLIER
-        target_distance = atr * cfg.ATR_TARGET_MULTIPLIER
+        risk_distance   = atr * _ATR_STOP_MULT
+        target_distance = atr * _ATR_TARGET_MULT
     else:
-        risk_distance   = price * cfg.STOP_LOSS_PCT
-        target_distance = price * cfg.TARGET_PCT
+        risk_distance   = price * _STOP_LOSS_PCT
+        target_distance = price * _TARGET_PCT
 
+    # Levels are kept at full precision for the exit comparisons; they are
+    # only rounded for display (%.2f in reasons, logs and emails).
     if side == "BUY":
-        stop_loss = round(price - risk_distance, 2)
-        target    = round(price + target_distance, 2)
+        stop_loss = price - risk_distance
+        target    = price + target_distance
     else:  # SHORT
-        stop_loss = round(price + risk_distance, 2)
-        target    = round(price - target_distance, 2)
+        stop_loss = price + risk_distance
+        target    = price - target_distance
 
-    return stop_loss, target, round(risk_distance, 2)
+    return stop_loss, target, risk_distance
 
 
 def _calc_quantity(price: float, available_capital: float, atr: float = 0) -> int:
@@ -442,14 +793,30 @@ def _calc_quantity(price: float, available_capital: float, atr: float = 0) -> in
     if price <= 0:
         return 0
 
-    if atr > 0:
-        risk_per_share = atr * cfg.ATR_STOP_MULTIPLIER
-    else:
-        risk_per_share = price * cfg.STOP_LOSS_PCT
-
-    if risk_per_share <= 0:
-        return 0
-
-    qty_by_risk    = int(cfg.RISK_PER_TRADE / risk_per_share)
+    qty_by_risk    = int(_QTY_K_ATR / atr) if atr > 0 else int(_QTY_K_PCT / price)
     qty_by_capital = int(available_capital / price)
     return max(min(qty_by_risk, qty_by_capital), 0)
+
+
+def _calc_stop_target_vec(
+    price: np.ndarray, atr: np.ndarray, sign: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Array version of _calc_stop_target() for many entries at once; sign is
+    +1 for BUY and -1 for SHORT.  Element-wise identical to the scalar.
+    """
+    has_atr         = atr > 0
+    risk_distance   = np.where(has_atr, atr * _ATR_STOP_MULT, price * _STOP_LOSS_PCT)
+    target_distance = np.where(has_atr, atr * _ATR_TARGET_MULT, price * _TARGET_PCT)
+    return price - sign * risk_distance, price + sign * target_distance, risk_distance
+
+
+def _calc_quantity_vec(
+    price: np.ndarray, available_capital: float, atr: np.ndarray
+) -> np.ndarray:
+    """Array version of _calc_quantity(); element-wise identical to the scalar."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        qty_by_risk    = np.where(atr > 0, _QTY_K_ATR / atr, _QTY_K_PCT / price)
+        qty_by_capital = available_capital / price
+        qty = np.trunc(np.minimum(qty_by_risk, qty_by_capital))
+    return np.where(price > 0, np.maximum(qty, 0), 0).astype(np.int64)